@@ -0,0 +1,117 @@
+"""
+Shared fixtures for macro-engine API tests.
+"""
+
+import asyncio
+import os
+
+import httpx
+import orjson
+import pytest
+import pytest_asyncio
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Applied as pytestmark by the integration modules: when no backend URL is
+# configured the whole suite skips at collection instead of timing out.
+requires_backend = pytest.mark.skipif(
+    not BASE_URL, reason="Set REACT_APP_BACKEND_URL to run the integration suite")
+
+
+def index_by(items, key):
+    """Index a list of records by one of their fields for O(1) lookups.
+
+    Duplicate keys are a data error in these payloads, so lookups via
+    the index can claim "exactly one" rather than just "present".
+    """
+    indexed = {}
+    for item in items:
+        value = item[key]
+        assert value not in indexed, f"Duplicate {key}={value!r} in payload"
+        indexed[value] = item
+    return indexed
+
+
+def assert_driver(payload, version, key, *, expected):
+    """Assert a driver key appears exactly once (or not at all) in one
+    side of a compare payload."""
+    components = payload.get(version, {}).get('drivers', {}).get('components', [])
+    count = sum(1 for c in components if c.get('key') == key)
+    if expected:
+        assert count == 1, f"{version} should have exactly 1 {key} driver, found {count}"
+    else:
+        assert count == 0, f"{version} should not have {key} driver, found {count}"
+
+
+def json_of(response):
+    """Parse a response body with orjson (faster than stdlib json on the
+    multi-KB pack payloads, and skips httpx's charset sniffing)."""
+    return orjson.loads(response.content)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Session-scoped httpx.Client with HTTP/2 and keep-alive.
+
+    All tests hit the same host, so one client multiplexes every request
+    over a single TLS connection instead of paying a handshake per call.
+    """
+    limits = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+    # Fail fast on unreachable backends instead of hanging a full read timeout
+    timeout = httpx.Timeout(10.0, connect=3.0)
+    with httpx.Client(base_url=BASE_URL, http2=True, limits=limits,
+                      timeout=timeout,
+                      headers={"Connection": "keep-alive"}) as client:
+        yield client
+
+
+@pytest.fixture(scope="module", autouse=True)
+def reset_after_tests(request):
+    """Reset the router to auto mode after each macro-engine module.
+
+    Only those modules hit the admin endpoints that mutate router state;
+    every other module skips the POST, as do unconfigured runs (no
+    backend URL), where it could only fail.
+    """
+    needs_reset = BASE_URL and request.module.__name__.startswith('test_macro_engine')
+    client = request.getfixturevalue('client') if needs_reset else None
+    yield
+    if client is not None:
+        client.post("/api/macro-engine/admin/reset")
+
+
+@pytest.fixture(scope="session")
+def dxy_pack(client):
+    """Parsed /api/macro-engine/v2/DXY/pack payload, fetched once per session."""
+    response = client.get("/api/macro-engine/v2/DXY/pack")
+    assert response.status_code == 200
+    return json_of(response)
+
+
+@pytest.fixture(scope="session")
+def dxy_compare(client):
+    """Parsed /api/macro-engine/DXY/compare payload, fetched once per session."""
+    response = client.get("/api/macro-engine/DXY/compare")
+    assert response.status_code == 200
+    return json_of(response)
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def aclient():
+    """Async sibling of `client` for tests that fan out GETs concurrently."""
+    limits = httpx.Limits(max_keepalive_connections=20, max_connections=100)
+    timeout = httpx.Timeout(10.0, connect=3.0)
+    async with httpx.AsyncClient(base_url=BASE_URL, http2=True, limits=limits,
+                                 timeout=timeout,
+                                 headers={"Connection": "keep-alive"}) as client:
+        yield client
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def v2_packs(aclient):
+    """Fetch both V2 DXY pack variants concurrently (one round of RTTs)."""
+    plain, h30d = await asyncio.gather(
+        aclient.get("/api/macro-engine/v2/DXY/pack"),
+        aclient.get("/api/macro-engine/v2/DXY/pack?horizon=30D"),
+    )
+    return plain, h30d
@@ -15,9 +15,12 @@ import requests
 import os
 import time
 
+from conftest import requires_backend
+
 BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
-if not BASE_URL:
-    raise ValueError("REACT_APP_BACKEND_URL not set")
+
+# Skip at collection when no backend URL is configured
+pytestmark = requires_backend
 
 # Valid regime labels per contract
 VALID_REGIME_LABELS = ['RISK_ON_SYNC', 'RISK_OFF_SYNC', 'FLIGHT_TO_QUALITY', 'DECOUPLED', 'MIXED']
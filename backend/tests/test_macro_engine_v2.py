@@ -12,11 +12,14 @@ import requests
 import os
 import time
 
+from conftest import requires_backend
+
 BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
 
-# Ensure BASE_URL is set
-if not BASE_URL:
-    raise ValueError("REACT_APP_BACKEND_URL environment variable must be set")
+# Skip at collection when no backend URL is configured; force-engine and
+# reset mutate shared router state, so the module also stays in the same
+# xdist group as the other router-state tests and serializes with them
+pytestmark = [requires_backend, pytest.mark.xdist_group("macro-engine-router")]
 
 
 @pytest.fixture(scope="module")
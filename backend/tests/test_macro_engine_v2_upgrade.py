@@ -9,35 +9,39 @@ Tests for:
 """
 
 import pytest
-import requests
-import os
-import time
 
-BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+from conftest import assert_driver, index_by, json_of, requires_backend
+
+# Every class here reads or mutates shared router state (status, routed
+# pack, admin promote/rollback/reset), so the whole module runs in one
+# xdist group and never interleaves with the lifecycle sequence
+pytestmark = [requires_backend, pytest.mark.xdist_group("macro-engine-router")]
 
 
 class TestMacroEngineStatus:
     """Test /api/macro-engine/status endpoint - V2 auto-activation"""
 
-    def test_status_endpoint_ok(self):
+    @pytest.fixture(scope="class", autouse=True)
+    def auto_mode(self, client):
+        """Reset the router to auto mode once for the whole class."""
+        client.post("/api/macro-engine/admin/reset")
+
+    def test_status_endpoint_ok(self, client):
         """GET /api/macro-engine/status returns ok with activeEngine and v2Readiness"""
-        res = requests.get(f"{BASE_URL}/api/macro-engine/status")
+        res = client.get("/api/macro-engine/status")
         assert res.status_code == 200, f"Expected 200, got {res.status_code}: {res.text}"
-        data = res.json()
+        data = json_of(res)
         
         assert data.get('ok') is True
         assert 'activeEngine' in data
         assert 'activeReason' in data
         assert 'v2Readiness' in data
 
-    def test_status_v2_auto_activated(self):
+    def test_status_v2_auto_activated(self, client):
         """Status shows activeEngine=v2 with AUTO_V2_READY when V2 confidence >= 0.6"""
-        # First reset to auto mode
-        requests.post(f"{BASE_URL}/api/macro-engine/admin/reset")
-        
-        res = requests.get(f"{BASE_URL}/api/macro-engine/status")
+        res = client.get("/api/macro-engine/status")
         assert res.status_code == 200
-        data = res.json()
+        data = json_of(res)
         
         # V2 should be active in auto mode
         assert data.get('activeEngine') == 'v2', f"Expected v2, got {data.get('activeEngine')}"
@@ -51,11 +55,11 @@ class TestMacroEngineStatus:
 class TestMacroEngineV2Health:
     """Test /api/macro-engine/v2/health endpoint - Gold data sufficiency"""
 
-    def test_v2_health_ok(self):
+    def test_v2_health_ok(self, client):
         """GET /api/macro-engine/v2/health returns ok=true with no issues"""
-        res = requests.get(f"{BASE_URL}/api/macro-engine/v2/health")
+        res = client.get("/api/macro-engine/v2/health")
         assert res.status_code == 200
-        data = res.json()
+        data = json_of(res)
         
         assert data.get('ok') is True
         assert data.get('version') == 'v2'
@@ -66,14 +70,16 @@ class TestMacroEngineV2Health:
 class TestMacroEngineDXYPack:
     """Test /api/macro-engine/DXY/pack - Router with auto V2"""
 
-    def test_dxy_pack_returns_v2_with_router(self):
+    @pytest.fixture(scope="class", autouse=True)
+    def auto_mode(self, client):
+        """Reset the router to auto mode once for the whole class."""
+        client.post("/api/macro-engine/admin/reset")
+
+    def test_dxy_pack_returns_v2_with_router(self, client):
         """GET /api/macro-engine/DXY/pack returns engineVersion=v2 with router field"""
-        # Reset to auto mode first
-        requests.post(f"{BASE_URL}/api/macro-engine/admin/reset")
-        
-        res = requests.get(f"{BASE_URL}/api/macro-engine/DXY/pack")
+        res = client.get("/api/macro-engine/DXY/pack")
         assert res.status_code == 200
-        data = res.json()
+        data = json_of(res)
         
         # Should be V2
         assert data.get('engineVersion') == 'v2'
@@ -88,28 +94,23 @@ class TestMacroEngineDXYPack:
 class TestMacroEngineV2DXYPack:
     """Test /api/macro-engine/v2/DXY/pack - Direct V2 access"""
 
-    def test_v2_pack_has_gold_driver(self):
+    def test_v2_pack_has_gold_driver(self, dxy_pack):
         """V2 pack includes GOLD driver with displayName containing XAUUSD"""
-        res = requests.get(f"{BASE_URL}/api/macro-engine/v2/DXY/pack")
-        assert res.status_code == 200
-        data = res.json()
+        data = dxy_pack
         
         components = data.get('drivers', {}).get('components', [])
-        gold_drivers = [c for c in components if c.get('key') == 'GOLD']
+        gold = index_by(components, 'key').get('GOLD')
         
-        assert len(gold_drivers) == 1, "Expected exactly 1 GOLD driver"
-        gold = gold_drivers[0]
+        assert gold is not None, "Expected exactly 1 GOLD driver"
         
         # Check displayName contains XAUUSD
         assert 'XAUUSD' in gold.get('displayName', ''), f"Gold displayName should contain XAUUSD, got {gold.get('displayName')}"
         # Check weight > 0
         assert gold.get('weight', 0) > 0, f"Gold weight should be > 0, got {gold.get('weight')}"
 
-    def test_v2_pack_has_state_info(self):
+    def test_v2_pack_has_state_info(self, dxy_pack):
         """V2 pack contains meta.stateInfo with volScale and weightsSource"""
-        res = requests.get(f"{BASE_URL}/api/macro-engine/v2/DXY/pack")
-        assert res.status_code == 200
-        data = res.json()
+        data = dxy_pack
         
         state_info = data.get('meta', {}).get('stateInfo', {})
         
@@ -121,11 +122,9 @@ class TestMacroEngineV2DXYPack:
         # weightsSource should be calibrated
         assert state_info.get('weightsSource') == 'calibrated', f"Expected calibrated, got {state_info.get('weightsSource')}"
 
-    def test_v2_pack_regime_confidence_high(self):
+    def test_v2_pack_regime_confidence_high(self, dxy_pack):
         """V2 regime confidence should be >= 0.6 (not old 0.48)"""
-        res = requests.get(f"{BASE_URL}/api/macro-engine/v2/DXY/pack")
-        assert res.status_code == 200
-        data = res.json()
+        data = dxy_pack
         
         confidence = data.get('regime', {}).get('confidence', 0)
         
@@ -136,14 +135,16 @@ class TestMacroEngineV2DXYPack:
 class TestMacroEngineAdminActive:
     """Test /api/macro-engine/admin/active endpoint"""
 
-    def test_get_admin_active(self):
+    @pytest.fixture(scope="class", autouse=True)
+    def auto_mode(self, client):
+        """Reset the router to auto mode once for the whole class."""
+        client.post("/api/macro-engine/admin/reset")
+
+    def test_get_admin_active(self, client):
         """GET /api/macro-engine/admin/active returns active engine and mode"""
-        # Reset to auto mode first
-        requests.post(f"{BASE_URL}/api/macro-engine/admin/reset")
-        
-        res = requests.get(f"{BASE_URL}/api/macro-engine/admin/active?asset=DXY")
+        res = client.get("/api/macro-engine/admin/active?asset=DXY")
         assert res.status_code == 200
-        data = res.json()
+        data = json_of(res)
         
         assert data.get('ok') is True
         assert data.get('asset') == 'DXY'
@@ -154,83 +155,59 @@ class TestMacroEngineAdminActive:
 class TestMacroEngineAdminLifecycle:
     """Test admin promote/rollback/reset sequence"""
 
-    def test_rollback_to_v1(self):
-        """POST /api/macro-engine/admin/rollback switches to V1"""
-        payload = {"asset": "DXY", "to": "v1", "reason": "test_rollback"}
-        res = requests.post(f"{BASE_URL}/api/macro-engine/admin/rollback",
-                          json=payload)
+    def test_admin_lifecycle_sequence(self, client):
+        """rollback -> v1 pack, promote -> v2 pack, reset -> auto mode"""
+        # Rollback to V1 and verify the router serves V1
+        res = client.post("/api/macro-engine/admin/rollback",
+                          json={"asset": "DXY", "to": "v1", "reason": "test_rollback"})
         assert res.status_code == 200
-        data = res.json()
-        
+        data = json_of(res)
         assert data.get('ok') is True
         assert data.get('to') == 'v1'
 
-    def test_verify_v1_after_rollback(self):
-        """GET /api/macro-engine/DXY/pack returns V1 after rollback"""
-        # First rollback to V1
-        requests.post(f"{BASE_URL}/api/macro-engine/admin/rollback",
-                     json={"asset": "DXY", "to": "v1", "reason": "test"})
-        
-        res = requests.get(f"{BASE_URL}/api/macro-engine/DXY/pack")
+        res = client.get("/api/macro-engine/DXY/pack")
         assert res.status_code == 200
-        data = res.json()
-        
+        data = json_of(res)
         assert data.get('engineVersion') == 'v1', f"Expected v1 after rollback, got {data.get('engineVersion')}"
 
-    def test_promote_to_v2(self):
-        """POST /api/macro-engine/admin/promote switches to V2"""
-        payload = {"asset": "DXY", "from": "v1", "to": "v2", "reason": "test_promote"}
-        res = requests.post(f"{BASE_URL}/api/macro-engine/admin/promote",
-                          json=payload)
+        # Promote back to V2 and verify the router serves V2
+        res = client.post("/api/macro-engine/admin/promote",
+                          json={"asset": "DXY", "from": "v1", "to": "v2", "reason": "test_promote"})
         assert res.status_code == 200
-        data = res.json()
-        
+        data = json_of(res)
         assert data.get('ok') is True
         assert data.get('to') == 'v2'
 
-    def test_verify_v2_after_promote(self):
-        """GET /api/macro-engine/DXY/pack returns V2 after promote"""
-        # First promote to V2
-        requests.post(f"{BASE_URL}/api/macro-engine/admin/promote",
-                     json={"asset": "DXY", "from": "v1", "to": "v2", "reason": "test"})
-        
-        res = requests.get(f"{BASE_URL}/api/macro-engine/DXY/pack")
+        res = client.get("/api/macro-engine/DXY/pack")
         assert res.status_code == 200
-        data = res.json()
-        
+        data = json_of(res)
         assert data.get('engineVersion') == 'v2', f"Expected v2 after promote, got {data.get('engineVersion')}"
 
-    def test_reset_to_auto(self):
-        """POST /api/macro-engine/admin/reset resets to auto mode"""
-        res = requests.post(f"{BASE_URL}/api/macro-engine/admin/reset")
+        # Reset and verify the router is back in auto mode
+        res = client.post("/api/macro-engine/admin/reset")
         assert res.status_code == 200
-        data = res.json()
-        
-        assert data.get('ok') is True
+        assert json_of(res).get('ok') is True
 
-    def test_verify_auto_after_reset(self):
-        """GET /api/macro-engine/DXY/pack uses auto mode after reset"""
-        # Reset to auto
-        requests.post(f"{BASE_URL}/api/macro-engine/admin/reset")
-        
-        res = requests.get(f"{BASE_URL}/api/macro-engine/DXY/pack")
+        res = client.get("/api/macro-engine/DXY/pack")
         assert res.status_code == 200
-        data = res.json()
-        
-        router = data.get('router', {})
+        router = json_of(res).get('router', {})
         assert router.get('mode') == 'auto', f"Expected auto mode after reset, got {router.get('mode')}"
 
 
 class TestMacroEngineCalibration:
     """Test /api/macro-engine/v2/calibration/run with sanity checks"""
 
-    def test_calibration_run_sanity_checks(self):
-        """POST /api/macro-engine/v2/calibration/run returns sanity checks passing"""
-        payload = {"symbol": "DXY"}
-        res = requests.post(f"{BASE_URL}/api/macro-engine/v2/calibration/run",
-                          json=payload)
+    @pytest.fixture(scope="class")
+    def calibration_result(self, client):
+        """Run calibration once; both tests assert against the same result."""
+        res = client.post("/api/macro-engine/v2/calibration/run",
+                          json={"symbol": "DXY"})
         assert res.status_code == 200
-        data = res.json()
+        return json_of(res)
+
+    def test_calibration_run_sanity_checks(self, calibration_result):
+        """POST /api/macro-engine/v2/calibration/run returns sanity checks passing"""
+        data = calibration_result
         
         assert data.get('ok') is True
         
@@ -250,51 +227,35 @@ class TestMacroEngineCalibration:
         # Check coverage >= 0.8
         assert sanity.get('coverageOk') is True
 
-    def test_calibration_includes_gold(self):
+    def test_calibration_includes_gold(self, calibration_result):
         """Calibration topWeights includes GOLD"""
-        payload = {"symbol": "DXY"}
-        res = requests.post(f"{BASE_URL}/api/macro-engine/v2/calibration/run",
-                          json=payload)
-        assert res.status_code == 200
-        data = res.json()
-        
-        top_weights = data.get('topWeights', [])
-        gold_weights = [w for w in top_weights if w.get('key') == 'GOLD']
+        top_weights = calibration_result.get('topWeights', [])
         
         # GOLD should be in top weights
-        assert len(gold_weights) > 0, "GOLD should be in topWeights"
+        assert 'GOLD' in index_by(top_weights, 'key'), "GOLD should be in topWeights"
 
 
 class TestMacroEngineCompare:
     """Test /api/macro-engine/DXY/compare - V1 vs V2 comparison"""
 
-    def test_compare_v2_has_gold_v1_does_not(self):
+    def test_compare_v2_has_gold_v1_does_not(self, dxy_compare):
         """GET /api/macro-engine/DXY/compare shows V2 has GOLD, V1 does not"""
-        res = requests.get(f"{BASE_URL}/api/macro-engine/DXY/compare")
-        assert res.status_code == 200
-        data = res.json()
+        data = dxy_compare
         
         assert data.get('ok') is True
         
-        # V1 should not have GOLD
-        v1_components = data.get('v1', {}).get('drivers', {}).get('components', [])
-        v1_gold = [c for c in v1_components if c.get('key') == 'GOLD']
-        assert len(v1_gold) == 0, "V1 should not have GOLD driver"
-        
-        # V2 should have GOLD
-        v2_components = data.get('v2', {}).get('drivers', {}).get('components', [])
-        v2_gold = [c for c in v2_components if c.get('key') == 'GOLD']
-        assert len(v2_gold) == 1, "V2 should have GOLD driver"
+        assert_driver(data, 'v1', 'GOLD', expected=False)
+        assert_driver(data, 'v2', 'GOLD', expected=True)
 
 
 class TestMacroEngineStateCurrent:
     """Test /api/macro-engine/v2/state/current - Stored state with confidence"""
 
-    def test_state_current_has_confidence(self):
+    def test_state_current_has_confidence(self, client):
         """GET /api/macro-engine/v2/state/current returns stored state with confidence >= 0.6"""
-        res = requests.get(f"{BASE_URL}/api/macro-engine/v2/state/current?symbol=DXY")
+        res = client.get("/api/macro-engine/v2/state/current?symbol=DXY")
         assert res.status_code == 200
-        data = res.json()
+        data = json_of(res)
         
         assert data.get('ok') is True
         
@@ -303,10 +264,3 @@ class TestMacroEngineStateCurrent:
             confidence = state.get('confidence', 0)
             assert confidence >= 0.6, f"State confidence should be >= 0.6, got {confidence}"
 
-
-# Ensure tests reset to auto mode after running
-@pytest.fixture(scope="module", autouse=True)
-def reset_after_tests():
-    """Reset to auto mode after all tests complete"""
-    yield
-    requests.post(f"{BASE_URL}/api/macro-engine/admin/reset")
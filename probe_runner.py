@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Shared async HTTP probe pipeline for the root-level API test scripts.
+
+backend_test.py and regime_memory_final_test.py both fire independent
+probes at the same backend. This module gives them one event loop and
+one httpx.AsyncClient so every probe in a batch multiplexes over a
+single HTTP/2 connection (one TLS handshake, no per-request slow-start).
+"""
+
+import json
+import time
+from dataclasses import dataclass
+
+import anyio
+import httpx
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback keeps the scripts runnable anywhere
+    orjson = None
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+
+def loads(payload):
+    """Decode JSON bytes with orjson when available (3-10x faster)."""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def dumps(obj, *, indent=False):
+    """Encode an object to JSON bytes, optionally pretty-printed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode()
+
+
+@dataclass(slots=True)
+class Probe:
+    """One endpoint check: body is pre-serialized JSON bytes for POSTs.
+
+    prefix_only probes only inspect leading fields (ok/status): the
+    runner reads one decoded chunk and stops there when it already forms
+    complete JSON, which for these small status bodies is the common
+    case; otherwise the remainder is read once.
+    """
+    name: str
+    endpoint: str
+    method: str = "GET"
+    expected_status: int = 200
+    body: bytes | None = None
+    timeout: float = 30.0
+    prefix_only: bool = False
+
+
+@dataclass(slots=True)
+class Result:
+    name: str
+    ok: bool
+    status: int
+    elapsed_ms: int
+    error: str | None = None
+    content: bytes | None = None
+
+
+async def _run_one(client, probe, results, index):
+    t0 = time.monotonic_ns()
+    try:
+        if probe.prefix_only:
+            async with client.stream(probe.method, probe.endpoint,
+                                     timeout=probe.timeout) as response:
+                # aiter_bytes yields content-decoded data (aiter_raw would
+                # hand back gzip for compressing backends)
+                chunks = response.aiter_bytes(8192)
+                buf = bytearray(await anext(chunks, b''))
+                try:
+                    loads(bytes(buf))  # complete body in the first chunk
+                except Exception:
+                    # A strict prefix of a JSON document never parses, so
+                    # don't retry per chunk - read the remainder once
+                    async for chunk in chunks:
+                        buf += chunk
+                status, content = response.status_code, bytes(buf)
+        else:
+            response = await client.request(
+                probe.method, probe.endpoint, content=probe.body,
+                headers=JSON_HEADERS if probe.body is not None else None,
+                timeout=probe.timeout)
+            status, content = response.status_code, response.content
+        results[index] = Result(
+            name=probe.name,
+            ok=status == probe.expected_status,
+            status=status,
+            elapsed_ms=(time.monotonic_ns() - t0) // 1_000_000,
+            content=content)
+    except httpx.HTTPError as e:
+        results[index] = Result(
+            name=probe.name, ok=False, status=0,
+            elapsed_ms=(time.monotonic_ns() - t0) // 1_000_000,
+            error=str(e) or type(e).__name__)
+
+
+async def run_probes_with(client, probes):
+    """Run probes concurrently on an existing client; results keep order."""
+    results = [None] * len(probes)
+    async with anyio.create_task_group() as tg:
+        for index, probe in enumerate(probes):
+            tg.start_soon(_run_one, client, probe, results, index)
+    return results
+
+
+async def run_probes(base_url, probes, warmup=None):
+    """Run probes over one HTTP/2 connection; optional warmup endpoint
+    pays DNS + TLS + settings exchange before anything is timed.
+
+    When HTTP/2 is negotiated every probe multiplexes on the kept-alive
+    connection; against an HTTP/1.1-only backend the pool opens parallel
+    connections instead, so a long-tail probe (the 90s timeline) can't
+    queue the others into pool timeouts.
+    """
+    limits = httpx.Limits(max_connections=8, max_keepalive_connections=1)
+    async with httpx.AsyncClient(http2=True, base_url=base_url,
+                                 timeout=30.0, limits=limits) as client:
+        if warmup:
+            try:
+                await client.get(warmup, timeout=5.0)
+            except httpx.HTTPError:
+                pass  # probes will report the real failure
+        return await run_probes_with(client, probes)
+
+
+def run(base_url, probes, warmup=None):
+    """Synchronous entry point for callers without an event loop."""
+    return anyio.run(run_probes, base_url, probes, warmup)
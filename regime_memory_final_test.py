@@ -4,40 +4,55 @@ P10.1 Regime Memory State - Final Testing Results
 This test runs with extended timeout for timeline endpoint
 """
 
-import requests
-import json
 import sys
-from datetime import datetime, timedelta
-import time
+
+import numpy as np
+
+from probe_runner import Probe, loads as _loads, run as _run_probes
+
+SCOPES = ('macro', 'guard', 'crossAsset')
+
+# Probe spec, built once. Timeline is the slow endpoint - extended
+# timeout; its body stays raw since analysis reads only a few fields
+PROBE_SPEC = (
+    ('schema', False, Probe(
+        "Schema endpoint",
+        "/api/brain/v2/regime-memory/schema", timeout=60.0)),
+    ('current', False, Probe(
+        "Current state",
+        "/api/brain/v2/regime-memory/current", timeout=60.0)),
+    ('historical', False, Probe(
+        "Historical state (asOf=2026-02-15)",
+        "/api/brain/v2/regime-memory/current?asOf=2026-02-15", timeout=60.0)),
+    ('timeline', True, Probe(
+        "Timeline endpoint",
+        "/api/brain/v2/regime-memory/timeline?start=2026-01-01&end=2026-02-27&stepDays=7",
+        timeout=90.0)),
+)
+
+
+def _stability_check(days, flips, actual):
+    """Recompute the stability formula over whole arrays at once.
+
+    Returns (expected, ok) where ok flags entries matching the backend's
+    reported stability within 1e-3. Vectorizing keeps the arithmetic in C
+    so the same check scales to every timeline point, not just the
+    current snapshot.
+    """
+    days = np.asarray(days, dtype=np.float64)
+    flips = np.asarray(flips, dtype=np.float64)
+    expected = 0.5 * np.minimum(days / 90, 1) + 0.5 * np.maximum(0, 1 - flips / 10)
+    expected = np.round(expected * 1000) / 1000
+    ok = np.abs(np.asarray(actual, dtype=np.float64) - expected) < 1e-3
+    return expected, ok
+
 
 class RegimeMemoryFinalTester:
+    # Fixed attribute set: skips the per-instance __dict__ allocation
+    __slots__ = ('base_url',)
+
     def __init__(self, base_url="https://adaptive-learn-55.preview.emergentagent.com"):
         self.base_url = base_url
-        self.tests_run = 0
-        self.tests_passed = 0
-        self.results = []
-        
-    def test_with_long_timeout(self, name, endpoint, timeout=60):
-        """Test endpoint with extended timeout"""
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        
-        try:
-            print(f"⏱️  Testing {name} (timeout: {timeout}s)...")
-            response = requests.get(url, timeout=timeout)
-            
-            if response.status_code == 200:
-                data = response.json()
-                print(f"✅ PASS - {name}")
-                return True, data
-            else:
-                print(f"❌ FAIL - {name} (HTTP {response.status_code})")
-                return False, None
-        except requests.exceptions.Timeout:
-            print(f"❌ FAIL - {name} (Timeout after {timeout}s)")
-            return False, None
-        except Exception as e:
-            print(f"❌ FAIL - {name} (Error: {str(e)})")
-            return False, None
 
     def run_final_validation(self):
         """Run final validation tests"""
@@ -45,41 +60,33 @@ class RegimeMemoryFinalTester:
         print("  P10.1 REGIME MEMORY - FINAL VALIDATION")
         print("=" * 80)
         print()
-        
+
+        # The four probes are independent GETs against the same host: the
+        # shared runner overlaps them on one HTTP/2 connection, so the 90s
+        # timeline call no longer serializes behind the others
+        probe_results = _run_probes(
+            self.base_url, [probe for _, _, probe in PROBE_SPEC],
+            warmup="/api/health")
+
         results = {}
-        
-        # Test 1: Schema
-        success, data = self.test_with_long_timeout(
-            "Schema endpoint", 
-            "/api/brain/v2/regime-memory/schema"
-        )
-        results['schema'] = {'success': success, 'data': data}
-        
-        # Test 2: Current state
-        success, data = self.test_with_long_timeout(
-            "Current state", 
-            "/api/brain/v2/regime-memory/current"
-        )
-        results['current'] = {'success': success, 'data': data}
-        
-        # Test 3: Historical state
-        success, data = self.test_with_long_timeout(
-            "Historical state (asOf=2026-02-15)", 
-            "/api/brain/v2/regime-memory/current?asOf=2026-02-15"
-        )
-        results['historical'] = {'success': success, 'data': data}
-        
-        # Test 4: Timeline with extended timeout (slow endpoint)
-        success, data = self.test_with_long_timeout(
-            "Timeline endpoint", 
-            "/api/brain/v2/regime-memory/timeline?start=2026-01-01&end=2026-02-27&stepDays=7",
-            timeout=90  # Extended timeout
-        )
-        results['timeline'] = {'success': success, 'data': data}
-        
+        for (key, raw, _), res in zip(PROBE_SPEC, probe_results):
+            ok, data = res.ok, None
+            if ok:
+                try:
+                    data = res.content if raw else _loads(res.content)
+                except Exception:
+                    # e.g. a misrouted base_url serving the SPA's 200 HTML
+                    ok, data = False, None
+                    print(f"❌ FAIL - {res.name} (response body is not valid JSON)")
+                else:
+                    print(f"✅ PASS - {res.name} ({res.elapsed_ms}ms)")
+            else:
+                print(f"❌ FAIL - {res.name} ({res.error or f'HTTP {res.status}'})")
+            results[key] = {'success': ok, 'data': data}
+
         # Analyze results
         self.analyze_results(results)
-        
+
         return results
 
     def analyze_results(self, results):
@@ -87,13 +94,13 @@ class RegimeMemoryFinalTester:
         print("\n" + "=" * 80)
         print("  DETAILED ANALYSIS")
         print("=" * 80)
-        
+
         total_tests = len(results)
         passed_tests = sum(1 for r in results.values() if r['success'])
-        
+
         print(f"Overall Success Rate: {passed_tests}/{total_tests} ({passed_tests/total_tests*100:.1f}%)")
         print()
-        
+
         # Schema Analysis
         if results['schema']['success']:
             schema = results['schema']['data']
@@ -105,9 +112,9 @@ class RegimeMemoryFinalTester:
                 print(f"   - {scope}: {values_count} possible values")
         else:
             print("❌ Schema endpoint failed")
-        
+
         print()
-        
+
         # Current State Analysis
         if results['current']['success']:
             current = results['current']['data']
@@ -117,33 +124,30 @@ class RegimeMemoryFinalTester:
             print(f"   - Guard: {current['guard']['current']} ({current['guard']['daysInState']}d, stability: {current['guard']['stability']})")
             print(f"   - CrossAsset: {current['crossAsset']['current']} ({current['crossAsset']['daysInState']}d, stability: {current['crossAsset']['stability']})")
             print(f"   - InputsHash: {current['meta']['inputsHash']}")
-            
-            # Validate stability formula
-            for scope_name in ['macro', 'guard', 'crossAsset']:
-                scope_data = current[scope_name]
-                days = scope_data['daysInState']
-                flips = scope_data['flips30d']
-                stability = scope_data['stability']
-                
-                expected = 0.5 * min(days/90, 1) + 0.5 * max(0, 1-(flips/10))
-                expected = round(expected * 1000) / 1000
-                
-                if abs(stability - expected) < 0.001:
-                    print(f"   - {scope_name} stability formula: ✅ CORRECT ({stability} = {expected})")
+
+            # Validate stability formula for all scopes in one vector op
+            actual = [current[s]['stability'] for s in SCOPES]
+            expected, ok = _stability_check(
+                [current[s]['daysInState'] for s in SCOPES],
+                [current[s]['flips30d'] for s in SCOPES],
+                actual)
+            for i, scope_name in enumerate(SCOPES):
+                if ok[i]:
+                    print(f"   - {scope_name} stability formula: ✅ CORRECT ({actual[i]} = {expected[i]})")
                 else:
-                    print(f"   - {scope_name} stability formula: ❌ INCORRECT ({stability} ≠ {expected})")
+                    print(f"   - {scope_name} stability formula: ❌ INCORRECT ({actual[i]} ≠ {expected[i]})")
         else:
             print("❌ Current state endpoint failed")
-            
+
         print()
-        
-        # Historical State Analysis  
+
+        # Historical State Analysis
         if results['historical']['success']:
             historical = results['historical']['data']
             print("✅ Historical State Analysis:")
             print(f"   - AsOf: {historical.get('asOf')}")
             print(f"   - InputsHash: {historical['meta']['inputsHash']}")
-            
+
             # Compare with current for NoLookahead test
             if results['current']['success']:
                 current = results['current']['data']
@@ -153,7 +157,7 @@ class RegimeMemoryFinalTester:
                     hist_regime = historical[scope]['current']
                     curr_days = current[scope]['daysInState']
                     hist_days = historical[scope]['daysInState']
-                    
+
                     if curr_regime == hist_regime:
                         if hist_days <= curr_days:
                             print(f"     ✅ {scope}: {hist_regime} - {hist_days}d <= {curr_days}d")
@@ -163,12 +167,19 @@ class RegimeMemoryFinalTester:
                         print(f"     ⚠️  {scope}: Different regimes ({hist_regime} → {curr_regime})")
         else:
             print("❌ Historical state endpoint failed")
-            
+
         print()
-        
+
         # Timeline Analysis
+        timeline = None
         if results['timeline']['success']:
-            timeline = results['timeline']['data']
+            try:
+                # Parsed here on demand - the probe itself never materializes it
+                timeline = _loads(results['timeline']['data'])
+            except Exception:
+                pass  # non-JSON body; reported below
+
+        if timeline is not None:
             points = timeline.get('points', [])
             summary = timeline.get('summary', {})
             print("✅ Timeline Analysis:")
@@ -178,19 +189,36 @@ class RegimeMemoryFinalTester:
             print(f"   - Summary flips: macro={summary.get('macroFlips')}, guard={summary.get('guardFlips')}, crossAsset={summary.get('crossAssetFlips')}")
             print(f"   - Avg stability: macro={summary.get('avgMacroStability')}, guard={summary.get('avgGuardStability')}, crossAsset={summary.get('avgCrossAssetStability')}")
             print(f"   - Dominant regimes: {summary.get('dominantMacro')}/{summary.get('dominantGuard')}/{summary.get('dominantCrossAsset')}")
+
+            # Batch-validate the stability formula over every timeline
+            # point (rows = point x scope) instead of only the snapshot
+            rows = [
+                (sp['daysInState'], sp['flips30d'], sp['stability'])
+                for point in points
+                for sp in (point.get(s, {}) for s in SCOPES)
+                if 'daysInState' in sp and 'flips30d' in sp and 'stability' in sp
+            ]
+            if rows:
+                arr = np.asarray(rows, dtype=np.float64)
+                _, ok = _stability_check(arr[:, 0], arr[:, 1], arr[:, 2])
+                mismatches = int(np.count_nonzero(~ok))
+                if mismatches == 0:
+                    print(f"   - Stability formula over {len(rows)} point-scopes: ✅ CONSISTENT")
+                else:
+                    print(f"   - Stability formula over {len(rows)} point-scopes: ❌ {mismatches} mismatches at rows {np.where(~ok)[0].tolist()}")
         else:
-            print("❌ Timeline endpoint failed or timed out")
+            print("❌ Timeline endpoint failed, timed out or returned non-JSON")
 
 def main():
     tester = RegimeMemoryFinalTester()
     results = tester.run_final_validation()
-    
+
     # Create summary for test report
     success_count = sum(1 for r in results.values() if r['success'])
     total_count = len(results)
-    
+
     print(f"\n🎯 FINAL RESULT: {success_count}/{total_count} endpoints working correctly")
-    
+
     if success_count == total_count:
         print("🎉 All P10.1 Regime Memory endpoints are fully functional!")
         return 0
@@ -199,4 +227,4 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    sys.exit(main())
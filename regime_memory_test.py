@@ -4,197 +4,489 @@ P10.1 Regime Memory State - Specialized Backend Testing
 Tests: Schema, Current State, Historical State, Timeline, Determinism, NoLookahead, Stability
 """
 
-import requests
-import json
+import argparse
+import collections
 import sys
-from datetime import datetime, timedelta
 import time
-import hashlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlencode
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # the JIT is a bonus, not a dependency
+    njit = None
+
+try:
+    import xxhash
+
+    def _fingerprint(payload):
+        """64-bit body fingerprint (xxh3 processes ~16-32 bytes/cycle)."""
+        return xxhash.xxh3_64_intdigest(payload)
+except ImportError:
+    import zlib
+
+    def _fingerprint(payload):
+        """32-bit body fingerprint (crc32 is hardware-accelerated)."""
+        return zlib.crc32(payload)
+
+# Required-field sets, built once: validators diff them against
+# dict.keys() in a single C-level set subtraction instead of looping
+_SCOPES = ('macro', 'guard', 'crossAsset')
+_REQ_SCOPES = frozenset(_SCOPES)
+_REQ_CURRENT = frozenset(('asOf', 'macro', 'guard', 'crossAsset', 'meta'))
+_REQ_SCOPE = frozenset(('scope', 'current', 'since', 'daysInState', 'flips30d', 'stability'))
+_REQ_TIMELINE_TOP = frozenset(('start', 'end', 'stepDays'))
+_REQ_POINT = frozenset(('asOf', 'macro', 'guard', 'crossAsset'))
+_REQ_SUMMARY = frozenset(('macroFlips', 'guardFlips', 'crossAssetFlips',
+                          'avgMacroStability', 'avgGuardStability', 'avgCrossAssetStability'))
+
+# Fields the timeline stream taps for the bulk stability check
+_STAB_FIELDS = ('daysInState', 'flips30d', 'stability')
+
+
+if njit is not None:
+    # LLVM-compiled loop fuses clip/round without NumPy temporaries; the
+    # on-disk cache amortizes compilation across runs
+    @njit(cache=True, fastmath=True)
+    def _stability_kernel(days, flips):
+        out = np.empty_like(days)
+        for i in range(days.size):
+            ds = days[i] / 90.0
+            if ds > 1.0:
+                ds = 1.0
+            fs = 1.0 - flips[i] / 10.0
+            if fs < 0.0:
+                fs = 0.0
+            out[i] = round((0.5 * ds + 0.5 * fs) * 1000.0) / 1000.0
+        return out
+else:
+    def _stability_kernel(days, flips):
+        return np.round(0.5 * np.clip(days / 90.0, None, 1.0)
+                        + 0.5 * np.clip(1.0 - flips / 10.0, 0.0, None), 3)
+
+
+def _check_stability(days, flips, got):
+    """Vectorized stability recomputation over whole arrays.
+
+    Returns (expected, index of first mismatch or -1). One compiled
+    kernel call replaces the per-scope Python min/max/round loop and
+    scales unchanged from the 3-scope snapshot to every timeline point.
+    """
+    days = np.asarray(days, dtype=np.float64)
+    flips = np.asarray(flips, dtype=np.float64)
+    got = np.asarray(got, dtype=np.float64)
+    expected = _stability_kernel(days, flips)
+    # Both sides are defined to 3 decimals, so compare in integer
+    # milli-units: one branchless int-vector delta and a single any()
+    # branch at the end, instead of per-lane float abs/epsilon tests
+    delta = (np.rint(got * 1000.0).astype(np.int64)
+             - np.rint(expected * 1000.0).astype(np.int64))
+    bad = np.abs(delta) > 1
+    return expected, int(np.argmax(bad)) if bad.any() else -1
+# The HTTP/JSON stack (requests drags in urllib3, idna and charset
+# detection; probe_runner brings httpx/anyio) dominates cold start, so
+# it is imported on first tester construction, not at module import
+requests = HTTPAdapter = Retry = urllib3 = ijson = _dumps = _loads = None
+
+
+def _load_runtime_deps():
+    """Import the heavy HTTP/JSON stack on first use."""
+    global requests, HTTPAdapter, Retry, urllib3, ijson, _dumps, _loads
+    if requests is not None:
+        return
+    import ijson as _ijson_mod
+    import requests as _requests_mod
+    import urllib3 as _urllib3_mod
+    from requests.adapters import HTTPAdapter as _adapter, Retry as _retry
+    from probe_runner import dumps, loads
+    requests, HTTPAdapter, Retry = _requests_mod, _adapter, _retry
+    urllib3 = _urllib3_mod
+    ijson = _ijson_mod
+    _dumps, _loads = dumps, loads
+
+
+def validate_schema(response_data):
+    """Validate schema endpoint response"""
+    if not response_data.get('ok'):
+        return False, "Response not OK"
+
+    scopes = response_data.get('scopes', {})
+    missing = _REQ_SCOPES - scopes.keys()
+    if missing:
+        return False, f"Missing scopes: {sorted(missing)}"
+
+    # Check if each scope has values
+    for scope in _SCOPES:
+        if not scopes[scope].get('values'):
+            return False, f"Scope {scope} missing values"
+
+    return True, f"Found {len(scopes)} scopes: {list(scopes.keys())}"
+
+
+def validate_current_state(response_data):
+    """Validate current state response"""
+    if not response_data.get('ok'):
+        return False, "Response not OK"
+
+    missing = _REQ_CURRENT - response_data.keys()
+    if missing:
+        return False, f"Missing fields: {sorted(missing)}"
+
+    # Check each scope has required structure
+    for scope in _SCOPES:
+        missing = _REQ_SCOPE - response_data[scope].keys()
+        if missing:
+            return False, f"Missing {scope} fields: {sorted(missing)}"
+
+    # Check meta has inputsHash
+    if 'inputsHash' not in response_data['meta']:
+        return False, "Missing meta.inputsHash"
+
+    return True, f"Valid regime state for {response_data['asOf']}"
+
+
+def validate_timeline(top, first_point, summary, stats):
+    """Validate the streamed timeline pieces"""
+    if not top.get('ok'):
+        return False, "Response not OK"
+
+    missing = _REQ_TIMELINE_TOP - top.keys()
+    if missing:
+        return False, f"Missing fields: {sorted(missing)}"
+
+    if first_point is None:
+        return False, "No timeline points returned"
+
+    # Check first point structure
+    missing = _REQ_POINT - first_point.keys()
+    if missing:
+        return False, f"Missing point fields: {sorted(missing)}"
+
+    missing = _REQ_SUMMARY - summary.keys()
+    if missing:
+        return False, f"Missing summary fields: {sorted(missing)}"
+
+    # Bulk-check the stability formula over every tapped point-scope
+    lengths = {len(stats[field]) for field in _STAB_FIELDS}
+    if len(lengths) == 1 and lengths != {0}:
+        _, bad = _check_stability(stats['daysInState'], stats['flips30d'],
+                                  stats['stability'])
+        if bad >= 0:
+            return False, f"Stability formula mismatch at timeline point-scope {bad}"
+
+    # Point dates must strictly increase: one vectorized diff over the
+    # whole run instead of a Python pairwise scan
+    if len(stats['asOf']) > 1:
+        try:
+            dates = np.array(stats['asOf'], dtype='datetime64[D]')
+        except ValueError:
+            dates = None  # unparseable dates; skip the ordering check
+        if dates is not None:
+            increasing = np.diff(dates) > np.timedelta64(0, 'D')
+            if not increasing.all():
+                bad = int(np.argmin(increasing))
+                return False, f"Timeline dates not strictly increasing at point {bad + 1}"
+
+    # Recount flips per scope from the streamed regime labels and
+    # cross-check the summary totals
+    for scope in _SCOPES:
+        labels = stats['regimes'][scope]
+        reported = summary.get(f'{scope}Flips')
+        if len(labels) > 1 and isinstance(reported, int):
+            _, codes = np.unique(np.asarray(labels), return_inverse=True)
+            counted = int(np.count_nonzero(np.diff(codes)))
+            if counted != reported:
+                return False, (f"{scope} flips mismatch: summary says {reported}, "
+                               f"timeline shows {counted} transitions")
+
+    return True, f"Timeline from {top['start']} to {top['end']}, first point {first_point['asOf']}"
+
+
+def validate_stability_formula(response_data):
+    """Validate stability formula: 0.5*(days/90) + 0.5*(1-flips/10)"""
+    if not response_data.get('ok'):
+        return False, "Response not OK"
+
+    days = np.fromiter((response_data[s]['daysInState'] for s in _SCOPES),
+                       dtype=np.float64, count=len(_SCOPES))
+    flips = np.fromiter((response_data[s]['flips30d'] for s in _SCOPES),
+                        dtype=np.float64, count=len(_SCOPES))
+    got = np.fromiter((response_data[s]['stability'] for s in _SCOPES),
+                      dtype=np.float64, count=len(_SCOPES))
+
+    expected, bad = _check_stability(days, flips, got)
+    if bad >= 0:
+        return False, (f"{_SCOPES[bad]} stability mismatch: got {got[bad]}, "
+                       f"expected {expected[bad]} (days={int(days[bad])}, flips={int(flips[bad])})")
+
+    return True, "Stability formula validation passed"
+
+
+def _plan(urls, historical_date):
+    """Build the probe plan once: names, absolute URLs and validators.
+
+    Data-driven specs keep the run loop a plain map over tuples - no
+    per-call f-strings, no attribute lookups for validators.
+    """
+    return (
+        ("Schema with 3 scopes", urls['schema'], validate_schema),
+        ("Current regime state", urls['current'], validate_current_state),
+        (f"Historical state (asOf={historical_date})",
+         f"{urls['current']}?asOf={historical_date}", validate_current_state),
+    )
+
 
 class RegimeMemoryTester:
     def __init__(self, base_url="https://adaptive-learn-55.preview.emergentagent.com"):
+        _load_runtime_deps()
         self.base_url = base_url
         self.tests_run = 0
         self.tests_passed = 0
-        self.results = []
-        
+
+        # One wall-clock read per run; each result stores a small int
+        # delta and ISO strings are materialized only at report time
+        self._t0_wall = time.time()
+        self._t0_iso = datetime.fromtimestamp(self._t0_wall).isoformat()
+
+        # Endpoint URLs are fixed at construction: resolve them once so
+        # no call site (or thread-pool worker) rebuilds strings per call
+        prefix = f"{base_url}/api/brain/v2/regime-memory"
+        self._urls = {'schema': f"{prefix}/schema",
+                      'current': f"{prefix}/current",
+                      'timeline': f"{prefix}/timeline"}
+
+        # Columnar result storage (struct-of-arrays): parallel typed
+        # columns are cheaper to append to and scan than a dict per test;
+        # rows are only materialized for the final JSON report
+        self._names = []
+        self._successes = bytearray()
+        self._statuses = array('H')
+        self._errors = []
+        self._details = []
+        self._ts = array('L')
+
+        # One pooled session for the whole suite: every call reuses the
+        # same keep-alive connection instead of paying a TLS handshake
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                              max_retries=Retry(total=2, backoff_factor=0.1))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Content-Type': 'application/json',
+                                     'Accept': 'application/json',
+                                     'Accept-Encoding': 'gzip, deflate',
+                                     'Connection': 'keep-alive'})
+
+        # Hot GETs skip the requests wrapper (cookie jar, hook chain,
+        # Response construction) and hit the urllib3 pool directly; the
+        # session above stays for POSTs and the streamed timeline
+        self.http = urllib3.PoolManager(
+            num_pools=2, maxsize=8,
+            retries=urllib3.Retry(2, backoff_factor=0.1),
+            timeout=urllib3.Timeout(connect=5.0, read=30.0),
+            headers={'Accept': 'application/json',
+                     'Accept-Encoding': 'gzip, deflate',
+                     'Connection': 'keep-alive'})
+
+        # Small LRU over deterministic GETs: repeated probes of the same
+        # URL within a run (e.g. the stability re-check of /current) cost
+        # a dict hit instead of an HTTPS round trip. Determinism and
+        # consistency tests bypass it - they need fresh fetches
+        self._get_cache = collections.OrderedDict()
+
+        # Validators are pure functions of the response body, so their
+        # outcome is memoized on (validator name, body fingerprint):
+        # re-validating a byte-identical body is a dict hit
+        self._val_cache = collections.OrderedDict()
+
     def log_result(self, test_name, success, status_code, response_data, error=None, details=None):
         """Log test result with optional details"""
         self.tests_run += 1
         if success:
             self.tests_passed += 1
         
-        result = {
-            "test": test_name,
-            "success": success,
-            "status_code": status_code,
-            "timestamp": datetime.now().isoformat(),
-            "error": error,
-            "details": details
-        }
-        
-        self.results.append(result)
-        
-        # Print result
+        self._names.append(test_name)
+        self._successes.append(1 if success else 0)
+        self._statuses.append(status_code)
+        self._errors.append(error)
+        self._details.append(details)
+        self._ts.append(int((time.time() - self._t0_wall) * 1000))
+
+        # Print result: one write (and one stdout-lock acquisition) per
+        # test instead of up to four print syscalls
         status = "✅ PASS" if success else "❌ FAIL"
-        print(f"{status} - {test_name} (HTTP {status_code})")
+        buf = [f"{status} - {test_name} (HTTP {status_code})\n"]
         if error:
-            print(f"    Error: {error}")
+            buf.append(f"    Error: {error}\n")
         if details:
-            print(f"    Details: {details}")
-        print()
+            buf.append(f"    Details: {details}\n")
+        buf.append("\n")
+        sys.stdout.write("".join(buf))
 
-    def test_endpoint(self, name, method, endpoint, expected_status=200, data=None, validation_fn=None):
-        """Test a single API endpoint with optional custom validation"""
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        headers = {'Content-Type': 'application/json'}
+    _CACHE_SIZE = 8
+    _VAL_CACHE_SIZE = 64
+
+    def _fast_get(self, url):
+        """GET straight off the urllib3 pool, returning (status, body)"""
+        response = self.http.request('GET', url)
+        return response.status, response.data
+
+    def _fetch(self, method, url, data=None, bypass_cache=False):
+        """HTTP round-trip only, safe to run off-thread.
+
+        Returns (status_code, content, error); logging and validation
+        stay with the caller on the main thread. Successful GETs are
+        memoized for the duration of the run unless bypass_cache is set.
+        """
+        is_get = method.upper() == 'GET'
+        if is_get and not bypass_cache:
+            cached = self._get_cache.get(url)
+            if cached is not None:
+                self._get_cache.move_to_end(url)
+                return cached
 
         try:
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=headers, timeout=30)
+            if is_get:
+                status_code, content = self._fast_get(url)
             elif method.upper() == 'POST':
-                response = requests.post(url, json=data, headers=headers, timeout=30)
+                response = self.session.post(url, json=data, timeout=30)
+                status_code, content = response.status_code, response.content
             else:
                 raise ValueError(f"Unsupported method: {method}")
 
-            # Check status code
-            if response.status_code != expected_status:
-                self.log_result(name, False, response.status_code, None, 
-                              f"Expected {expected_status}, got {response.status_code}")
-                return False, None
+            if is_get and not bypass_cache and status_code == 200:
+                self._get_cache[url] = (status_code, content, None)
+                while len(self._get_cache) > self._CACHE_SIZE:
+                    self._get_cache.popitem(last=False)
+            return status_code, content, None
+        except (requests.exceptions.Timeout, urllib3.exceptions.TimeoutError):
+            return 0, None, "Request timeout (30s)"
+        except (requests.exceptions.ConnectionError, urllib3.exceptions.HTTPError):
+            return 0, None, "Connection error"
+        except Exception as e:
+            return 0, None, str(e)
 
-            try:
-                response_data = response.json()
-            except:
-                response_data = response.text
-
-            # Run custom validation if provided
-            validation_error = None
-            validation_details = None
-            if validation_fn and response_data:
+    def _evaluate(self, name, expected_status, validation_fn, status_code, content, error):
+        """Validate and log one fetched response body (main thread only)"""
+        if error is not None:
+            self.log_result(name, False, status_code, None, error)
+            return False, None
+
+        # Check status code
+        if status_code != expected_status:
+            self.log_result(name, False, status_code, None,
+                          f"Expected {expected_status}, got {status_code}")
+            return False, None
+
+        try:
+            response_data = _loads(content)
+        except:
+            response_data = content.decode('utf-8', errors='replace')
+
+        # Run custom validation if provided, reusing a memoized outcome
+        # when this validator already saw a byte-identical body
+        validation_error = None
+        validation_details = None
+        if validation_fn and response_data:
+            key = (validation_fn.__name__, _fingerprint(content))
+            cached = self._val_cache.get(key)
+            if cached is not None:
+                self._val_cache.move_to_end(key)
+                validation_details, validation_error = cached
+            else:
                 try:
                     validation_result = validation_fn(response_data)
                     if isinstance(validation_result, tuple):
                         validation_success, validation_details = validation_result
                     else:
                         validation_success = validation_result
-                    
+
                     if not validation_success:
                         validation_error = f"Validation failed: {validation_details}"
                 except Exception as e:
                     validation_error = f"Validation error: {str(e)}"
-                    validation_success = False
+                self._val_cache[key] = (validation_details, validation_error)
+                while len(self._val_cache) > self._VAL_CACHE_SIZE:
+                    self._val_cache.popitem(last=False)
 
-            success = response.status_code == expected_status and not validation_error
-            self.log_result(name, success, response.status_code, response_data, 
-                          validation_error, validation_details)
-            return success, response_data
+        success = status_code == expected_status and not validation_error
+        self.log_result(name, success, status_code, response_data,
+                      validation_error, validation_details)
+        return success, response_data
 
-        except requests.exceptions.Timeout:
-            self.log_result(name, False, 0, None, "Request timeout (30s)")
-            return False, None
-        except requests.exceptions.ConnectionError:
-            self.log_result(name, False, 0, None, "Connection error")
-            return False, None
-        except Exception as e:
-            self.log_result(name, False, 0, None, str(e))
-            return False, None
+    def _url(self, key, **query):
+        """Pre-resolved endpoint URL, with optional query parameters"""
+        base = self._urls[key]
+        return f"{base}?{urlencode(query)}" if query else base
 
-    def validate_schema(self, response_data):
-        """Validate schema endpoint response"""
-        if not response_data.get('ok'):
-            return False, "Response not OK"
-        
-        scopes = response_data.get('scopes', {})
-        required_scopes = ['macro', 'guard', 'crossAsset']
-        
-        for scope in required_scopes:
-            if scope not in scopes:
-                return False, f"Missing scope: {scope}"
-                
-        # Check if each scope has values
-        for scope in required_scopes:
-            if 'values' not in scopes[scope] or not scopes[scope]['values']:
-                return False, f"Scope {scope} missing values"
-                
-        return True, f"Found {len(scopes)} scopes: {list(scopes.keys())}"
+    def test_endpoint(self, name, method, url, expected_status=200, data=None,
+                      validation_fn=None, bypass_cache=False):
+        """Test a single API endpoint with optional custom validation"""
+        return self._evaluate(name, expected_status, validation_fn,
+                              *self._fetch(method, url, data, bypass_cache))
 
-    def validate_current_state(self, response_data):
-        """Validate current state response"""
-        if not response_data.get('ok'):
-            return False, "Response not OK"
-            
-        required_fields = ['asOf', 'macro', 'guard', 'crossAsset', 'meta']
-        for field in required_fields:
-            if field not in response_data:
-                return False, f"Missing field: {field}"
-                
-        # Check each scope has required structure
-        for scope in ['macro', 'guard', 'crossAsset']:
-            scope_data = response_data[scope]
-            scope_required = ['scope', 'current', 'since', 'daysInState', 'flips30d', 'stability']
-            for req_field in scope_required:
-                if req_field not in scope_data:
-                    return False, f"Missing {scope}.{req_field}"
-                    
-        # Check meta has inputsHash
-        if 'inputsHash' not in response_data['meta']:
-            return False, "Missing meta.inputsHash"
-            
-        return True, f"Valid regime state for {response_data['asOf']}"
 
-    def validate_timeline(self, response_data):
-        """Validate timeline response"""
-        if not response_data.get('ok'):
-            return False, "Response not OK"
-            
-        required_fields = ['start', 'end', 'stepDays', 'points', 'summary']
-        for field in required_fields:
-            if field not in response_data:
-                return False, f"Missing field: {field}"
-                
-        points = response_data.get('points', [])
-        if not points:
-            return False, "No timeline points returned"
-            
-        # Check first point structure
-        first_point = points[0]
-        point_required = ['asOf', 'macro', 'guard', 'crossAsset']
-        for field in point_required:
-            if field not in first_point:
-                return False, f"Missing point field: {field}"
-                
-        summary = response_data.get('summary', {})
-        summary_required = ['macroFlips', 'guardFlips', 'crossAssetFlips', 
-                          'avgMacroStability', 'avgGuardStability', 'avgCrossAssetStability']
-        for field in summary_required:
-            if field not in summary:
-                return False, f"Missing summary field: {field}"
-                
-        return True, f"Timeline with {len(points)} points from {response_data['start']} to {response_data['end']}"
 
-    def validate_stability_formula(self, response_data):
-        """Validate stability formula: 0.5*(days/90) + 0.5*(1-flips/10)"""
-        if not response_data.get('ok'):
-            return False, "Response not OK"
-            
-        for scope_name in ['macro', 'guard', 'crossAsset']:
-            scope_data = response_data[scope_name]
-            days = scope_data['daysInState']
-            flips = scope_data['flips30d']
-            stability = scope_data['stability']
-            
-            # Calculate expected stability
-            duration_score = min(days / 90, 1)
-            flip_score = max(0, 1 - (flips / 10))
-            expected_stability = 0.5 * duration_score + 0.5 * flip_score
-            expected_stability = round(expected_stability * 1000) / 1000  # 3 decimal places
-            
-            # Allow small floating point differences
-            if abs(stability - expected_stability) > 0.001:
-                return False, f"{scope_name} stability mismatch: got {stability}, expected {expected_stability} (days={days}, flips={flips})"
-                
-        return True, "Stability formula validation passed"
+    def _fetch_timeline(self, url):
+        """Stream the timeline body, safe to run off-thread.
+
+        Returns (status, top, first_point, summary, stats, error). Only the
+        first point and the summary are ever materialized: ijson walks
+        the byte stream event by event, so peak memory stays O(1) no
+        matter how many points the date range produces, and the unread
+        tail is dropped when the response closes.
+        """
+        try:
+            response = self.session.get(url, stream=True, timeout=30)
+            try:
+                if response.status_code != 200:
+                    return response.status_code, None, None, None, None, None
+
+                response.raw.decode_content = True
+                top = {}
+                stats = {field: [] for field in _STAB_FIELDS}
+                stats['asOf'] = []
+                stats['regimes'] = {scope: [] for scope in _SCOPES}
+
+                def tap(events):
+                    # Record top-level scalars (ok/start/end/stepDays),
+                    # per-point stability inputs, point dates and regime
+                    # labels as they stream past on the way to the first
+                    # point and the summary
+                    for prefix, event, value in events:
+                        if prefix.startswith('points.'):
+                            if event == 'number':
+                                leaf = prefix.rpartition('.')[2]
+                                if leaf in stats:
+                                    stats[leaf].append(value)
+                            elif event == 'string':
+                                parts = prefix.split('.')
+                                if parts[-1] == 'asOf' and len(parts) == 3:
+                                    stats['asOf'].append(value)
+                                elif parts[-1] == 'current' and len(parts) == 4:
+                                    bucket = stats['regimes'].get(parts[2])
+                                    if bucket is not None:
+                                        bucket.append(value)
+                        elif prefix and '.' not in prefix and event in ('boolean', 'string', 'number'):
+                            top[prefix] = value
+                        yield prefix, event, value
+
+                events = tap(ijson.parse(response.raw))
+                first_point = next(ijson.common.items(events, 'points.item'), None)
+                summary = dict(ijson.common.kvitems(events, 'summary'))
+                return 200, top, first_point, summary, stats, None
+            finally:
+                response.close()
+        except requests.exceptions.Timeout:
+            return 0, None, None, None, None, "Request timeout (30s)"
+        except Exception as e:
+            return 0, None, None, None, None, str(e)
+
+
 
     def run_regime_memory_tests(self):
         """Run comprehensive P10.1 Regime Memory tests"""
@@ -202,50 +494,35 @@ class RegimeMemoryTester:
         print("  P10.1 REGIME MEMORY STATE - SPECIALIZED TESTING")
         print("=" * 80)
         print(f"Backend URL: {self.base_url}")
-        print(f"Test started: {datetime.now().isoformat()}")
+        print(f"Test started: {self._t0_iso}")
         print()
 
-        # Test 1: Schema endpoint - must return 3 scopes
-        print("🔍 Testing Schema Endpoint...")
-        self.test_endpoint(
-            "Schema with 3 scopes", 
-            "GET", 
-            "/api/brain/v2/regime-memory/schema",
-            200,
-            validation_fn=self.validate_schema
-        )
-
-        # Test 2: Current state (without asOf)
-        print("🔍 Testing Current State...")
-        success, current_response = self.test_endpoint(
-            "Current regime state", 
-            "GET", 
-            "/api/brain/v2/regime-memory/current",
-            200,
-            validation_fn=self.validate_current_state
-        )
-
-        # Test 3: Historical state (with asOf)
-        print("🔍 Testing Historical State...")
+        # Tests 1-4: Schema, current, historical and timeline are
+        # independent GETs - overlap their round trips in a thread pool
+        # and keep validation/logging on the main thread
         historical_date = "2026-02-15"
-        success_hist, historical_response = self.test_endpoint(
-            f"Historical state (asOf={historical_date})", 
-            "GET", 
-            f"/api/brain/v2/regime-memory/current?asOf={historical_date}",
-            200,
-            validation_fn=self.validate_current_state
-        )
-
-        # Test 4: Timeline endpoint
-        print("🔍 Testing Timeline Endpoint...")
-        timeline_params = "start=2026-01-01&end=2026-02-27&stepDays=7"
-        self.test_endpoint(
-            "Timeline with summary", 
-            "GET", 
-            f"/api/brain/v2/regime-memory/timeline?{timeline_params}",
-            200,
-            validation_fn=self.validate_timeline
-        )
+        probes = _plan(self._urls, historical_date)
+
+        print("🔍 Testing Schema, Current, Historical and Timeline concurrently...")
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            timeline_future = executor.submit(
+                self._fetch_timeline,
+                self._url('timeline', start="2026-01-01", end="2026-02-27", stepDays=7))
+            futures = [executor.submit(self._fetch, "GET", url)
+                       for _, url, _ in probes]
+            outcomes = [self._evaluate(name, 200, validator, *future.result())
+                        for (name, _, validator), future in zip(probes, futures)]
+            status, top, first_point, summary, stats, error = timeline_future.result()
+
+        if error or status != 200:
+            self.log_result("Timeline with summary", False, status, None,
+                          error or f"Expected 200, got {status}")
+        else:
+            valid, details = validate_timeline(top, first_point, summary, stats)
+            self.log_result("Timeline with summary", valid, status, None,
+                          None if valid else f"Validation failed: {details}", details)
+
+        _, (success, current_response), (success_hist, historical_response) = outcomes
 
         # Test 5: Determinism test - same asOf should produce same inputsHash
         print("🔍 Testing Determinism...")
@@ -261,11 +538,11 @@ class RegimeMemoryTester:
         print("🔍 Testing Stability Formula...")
         if success and current_response:
             self.test_endpoint(
-                "Stability formula validation", 
-                "GET", 
-                "/api/brain/v2/regime-memory/current",
+                "Stability formula validation",
+                "GET",
+                self._urls['current'],
                 200,
-                validation_fn=self.validate_stability_formula
+                validation_fn=validate_stability_formula
             )
 
         # Test 8: Multiple calls to same asOf for consistency
@@ -279,11 +556,11 @@ class RegimeMemoryTester:
         """Test determinism: same asOf should produce same inputsHash"""
         try:
             # Make another call to the same historical date
-            url = f"{self.base_url}/api/brain/v2/regime-memory/current?asOf={historical_date}"
-            response = requests.get(url, timeout=30)
-            
-            if response.status_code == 200:
-                second_call = response.json()
+            url = self._url('current', asOf=historical_date)
+            status, content = self._fast_get(url)
+
+            if status == 200:
+                second_call = _loads(content)
                 
                 first_hash = historical_response['meta']['inputsHash']
                 second_hash = second_call['meta']['inputsHash']
@@ -295,7 +572,7 @@ class RegimeMemoryTester:
                     self.log_result("Determinism Test", False, 200, None, 
                                   f"Different inputsHash: {first_hash} vs {second_hash}")
             else:
-                self.log_result("Determinism Test", False, response.status_code, None, 
+                self.log_result("Determinism Test", False, status, None,
                               "Failed to make second call for determinism test")
         except Exception as e:
             self.log_result("Determinism Test", False, 0, None, str(e))
@@ -330,30 +607,35 @@ class RegimeMemoryTester:
     def test_multiple_calls_consistency(self, test_date):
         """Test that multiple calls to same asOf return consistent results"""
         try:
-            url = f"{self.base_url}/api/brain/v2/regime-memory/current?asOf={test_date}"
-            
-            # Make 3 calls
+            url = self._url('current', asOf=test_date)
+
+            # Make 3 calls, all in flight at once
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                raw_responses = list(executor.map(
+                    lambda _: self._fast_get(url), range(3)))
+
             responses = []
-            for i in range(3):
-                response = requests.get(url, timeout=30)
-                if response.status_code == 200:
-                    responses.append(response.json())
+            fingerprints = []
+            for i, (status, content) in enumerate(raw_responses):
+                if status == 200:
+                    # Whole-body fingerprint: stricter and cheaper than
+                    # parsing just to compare inputsHash fields
+                    fingerprints.append(_fingerprint(content))
+                    responses.append(_loads(content))
                 else:
-                    self.log_result("Multiple Calls Consistency", False, response.status_code, None, 
+                    self.log_result("Multiple Calls Consistency", False, status, None,
                                   f"Call {i+1} failed")
                     return
                     
             # Compare all responses
             first_hash = responses[0]['meta']['inputsHash']
-            all_same = all(r['meta']['inputsHash'] == first_hash for r in responses)
-            
-            if all_same:
+            if len(set(fingerprints)) == 1:
                 self.log_result("Multiple Calls Consistency", True, 200, None, None, 
-                              f"All 3 calls returned same inputsHash: {first_hash}")
+                              f"All 3 calls returned byte-identical bodies (inputsHash: {first_hash})")
             else:
                 hashes = [r['meta']['inputsHash'] for r in responses]
                 self.log_result("Multiple Calls Consistency", False, 200, None,
-                              f"Inconsistent hashes: {hashes}")
+                              f"Inconsistent bodies; inputsHash values: {hashes}")
                               
         except Exception as e:
             self.log_result("Multiple Calls Consistency", False, 0, None, str(e))
@@ -369,15 +651,15 @@ class RegimeMemoryTester:
         print(f"Success Rate: {(self.tests_passed/self.tests_run*100):.1f}%" if self.tests_run > 0 else "0%")
         print()
 
-        # Show failed tests
-        failed_tests = [r for r in self.results if not r['success']]
-        if failed_tests:
+        # Show failed tests (one bytearray scan)
+        failed = [i for i, ok in enumerate(self._successes) if not ok]
+        if failed:
             print("❌ FAILED TESTS:")
-            for test in failed_tests:
-                error_msg = test['error'] or f"HTTP {test['status_code']}"
-                print(f"  - {test['test']}: {error_msg}")
-                if test['details']:
-                    print(f"    Details: {test['details']}")
+            for i in failed:
+                error_msg = self._errors[i] or f"HTTP {self._statuses[i]}"
+                print(f"  - {self._names[i]}: {error_msg}")
+                if self._details[i]:
+                    print(f"    Details: {self._details[i]}")
             print()
         else:
             print("🎉 All tests passed!")
@@ -387,24 +669,51 @@ class RegimeMemoryTester:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         results_file = f"/app/test_reports/regime_memory_test_{timestamp}.json"
         
-        with open(results_file, 'w') as f:
-            json.dump({
+        with open(results_file, 'wb') as f:
+            # Stream the report: pretty summary header first, then one
+            # compact record per result. Rows are materialized one at a
+            # time from the columns, so the writer never holds the whole
+            # report tree (or pays indent bookkeeping over its bulk)
+            f.write(_dumps({
                 'summary': {
                     'module': 'P10.1 Regime Memory State',
                     'tests_run': self.tests_run,
                     'tests_passed': self.tests_passed,
                     'success_rate': (self.tests_passed/self.tests_run*100) if self.tests_run > 0 else 0,
-                    'timestamp': datetime.now().isoformat(),
+                    'timestamp': self._t0_iso,
                     'backend_url': self.base_url
-                },
-                'results': self.results
-            }, f, indent=2)
-        
+                }
+            }, indent=True)[:-1])  # strip the closing brace
+            f.write(b',\n  "results": [')
+            for i, delta_ms in enumerate(self._ts):
+                if i:
+                    f.write(b',')
+                f.write(_dumps({
+                    'test': self._names[i],
+                    'success': bool(self._successes[i]),
+                    'status_code': self._statuses[i],
+                    'timestamp': datetime.fromtimestamp(
+                        self._t0_wall + delta_ms / 1000).isoformat(),
+                    't_ms': delta_ms,
+                    'error': self._errors[i],
+                    'details': self._details[i]
+                }))
+            f.write(b']}')
+
         print(f"📄 Detailed results saved: {results_file}")
+        self.session.close()
+        self.http.clear()
         return self.tests_passed == self.tests_run
 
 def main():
-    tester = RegimeMemoryTester()
+    parser = argparse.ArgumentParser(
+        description="P10.1 Regime Memory State specialized backend tests")
+    parser.add_argument(
+        "--base-url", default="https://adaptive-learn-55.preview.emergentagent.com",
+        help="Backend base URL to test against")
+    args = parser.parse_args()
+
+    tester = RegimeMemoryTester(base_url=args.base_url)
     success = tester.run_regime_memory_tests()
     return 0 if success else 1
 